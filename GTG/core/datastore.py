@@ -63,6 +63,10 @@ class DataStore():
         self._backend_signals = BackendSignals()
         self.conf = global_conf
         self.tag_idmap = {}
+        # tag name -> names of the tag and all its descendants, valid as
+        # long as Tag._hierarchy_version equals _tag_closures_version
+        self._tag_closures = {}
+        self._tag_closures_version = -1
 
         # Flag when turned to true, all pending operation should be
         # completed and then GTG should quit
@@ -110,6 +114,7 @@ class DataStore():
         self._tasks.add_filter(name, filter_func, parameters=parameters)
         self._tagstore.add_node(tag, parent_id=parent_id)
         tag.set_save_callback(self.save)
+        Tag.bump_hierarchy_version()
 
     def new_tag(self, name, attributes={}, tid=None):
         """
@@ -150,6 +155,7 @@ class DataStore():
         """ Removes a tag from the tagtree """
         if self._tagstore.has_node(name):
             self._tagstore.del_node(name)
+            Tag.bump_hierarchy_version()
             self.save_tagtree()
         else:
             raise IndexError(f"There is no tag {name}")
@@ -221,6 +227,38 @@ class DataStore():
         else:
             return None
 
+    def get_tag_closure(self, tagname):
+        """
+        Returns the names of a tag and of all its descendants
+
+        @return frozenset of tag names
+        """
+        if self._tag_closures_version != Tag._hierarchy_version:
+            self._tag_closures = {}
+            self._tag_closures_version = Tag._hierarchy_version
+
+        closure = self._tag_closures.get(tagname)
+        if closure is None:
+            # Walk the descendants with an explicit stack. Each tag is
+            # expanded once, which also protects against cycles.
+            names = set()
+            stack = [tagname]
+            while stack:
+                name = stack.pop()
+                if name in names:
+                    continue
+                cached = self._tag_closures.get(name)
+                if cached is not None:
+                    names |= cached
+                    continue
+                names.add(name)
+                tag = self.get_tag(name)
+                if tag:
+                    stack.extend(tag.get_children())
+            closure = frozenset(names)
+            self._tag_closures[tagname] = closure
+        return closure
+
     def load_tag_tree(self, tag_tree):
         """
         Loads the tag tree from a xml file
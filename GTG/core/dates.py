@@ -26,6 +26,7 @@ Date.parse() parses all possible representations of a date. """
 import calendar
 import datetime
 import locale
+import math
 
 from gettext import gettext as _, ngettext
 
@@ -85,6 +86,28 @@ def convert_datetime_to_date(aday):
     return datetime.date(aday.year, aday.month, aday.day)
 
 
+def _recurring_strides():
+    """ Returns the number of days between two occurrences of the
+    recurring terms which don't depend on the date, by term """
+    return {
+        'day': 1,
+        # Translators: Used in recurring parsing, made lowercased in code
+        _('day').lower(): 1,
+        'other-day': 2,
+        # Translators: Used in recurring parsing, made lowercased in code
+        _('other-day').lower(): 2,
+        'week': 7,
+        # Translators: Used in recurring parsing, made lowercased in code
+        _('week').lower(): 7,
+    }
+
+
+def get_recurring_stride(term):
+    """ Returns the number of days between two occurrences of a recurring
+    term, or None if it depends on the date (months, week days...) """
+    return _recurring_strides().get(term.lower())
+
+
 class Date():
     """A date class that supports fuzzy dates.
 
@@ -508,24 +531,17 @@ class Date():
             newtask (bool, optional): depending on the task if it is a new one or not, the offset changes
         """
         # accepted date formats
-        formats = {
-            # change the offset depending on the task.
-            'day': 0 if newtask else 1,
-            # Translators: Used in recurring parsing, made lowercased in code
-            _('day').lower(): 0 if newtask else 1,
-            'other-day': 0 if newtask else 2,
-            # Translators: Used in recurring parsing, made lowercased in code
-            _('other-day').lower(): 0 if newtask else 2,
-            'week': 0 if newtask else 7,
-            # Translators: Used in recurring parsing, made lowercased in code
-            _('week').lower(): 0 if newtask else 7,
+        # change the offset depending on the task.
+        formats = {term: 0 if newtask else stride
+                   for term, stride in _recurring_strides().items()}
+        formats.update({
             'month': 0 if newtask else calendar.mdays[self.month],
             # Translators: Used in recurring parsing, made lowercased in code
             _('month').lower(): 0 if newtask else calendar.mdays[self.month],
             'year': 0 if newtask else 365 + int(calendar.isleap(self.year)),
             # Translators: Used in recurring parsing, made lowercased in code
             _('year').lower(): 0 if newtask else 365 + int(calendar.isleap(self.year)),
-        }
+        })
 
         # add week day names in the current locale
         for i, (english, local) in enumerate([
@@ -570,6 +586,19 @@ class Date():
         else:
             raise ValueError(f"Can't parse date '{string}'")
 
+    def skip_recurrences_before(self, string, day):
+        """ Returns the first occurrence of the recurring term string,
+        starting from this date, which is not before day """
+        result = self
+        stride = get_recurring_stride(string)
+        if stride and result < day:
+            # Jump over the occurrences before day in one step
+            days_late = (day - result).days
+            result += datetime.timedelta(math.ceil(days_late / stride) * stride)
+        while result < day:
+            result = result.parse_from_date(string, newtask=False)
+        return result
+
     def to_readable_string(self):
         """ Return nice representation of date.
 
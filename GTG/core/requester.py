@@ -23,6 +23,7 @@ import logging
 from gi.repository import GObject
 
 from GTG.core.tag import Tag
+from GTG.core.task import Task
 
 log = logging.getLogger(__name__)
 
@@ -141,7 +142,12 @@ class Requester(GObject.GObject):
         """
         # send the signal before actually deleting the task !
         log.debug("deleting task %s", tid)
-        return self.__basetree.del_node(tid, recursive=recursive)
+        result = self.__basetree.del_node(tid, recursive=recursive)
+        # Removing the node changes the parents and children of the tasks
+        # around it without going through Task, so their cached urgency,
+        # due constraints and relatives must be invalidated here
+        Task.bump_tree_version()
+        return result
 
     def get_task_id(self, task_title):
         """ Heuristic which convert task_title to a task_id
@@ -218,6 +224,10 @@ class Requester(GObject.GObject):
     def get_tag(self, tagname):
         return self.ds.get_tag(tagname)
 
+    def get_tag_closure(self, tagname):
+        """Return the names of a tag and of all its descendants"""
+        return self.ds.get_tag_closure(tagname)
+
     def get_used_tags(self):
         """Return tags currently used by a task.
 
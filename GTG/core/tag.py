@@ -74,6 +74,10 @@ class Tag(TreeNode):
     for tags is C{name}, which always matches L{Tag.get_name()}.
     """
 
+    # Bumped whenever a tag is added, removed or moved in the tag tree, so
+    # that the tag closures cached by the DataStore can be recomputed
+    _hierarchy_version = 0
+
     def __init__(self, name, req, attributes={}, tid=None):
         """Construct a tag.
 
@@ -128,16 +132,35 @@ class Tag(TreeNode):
         vc = self.__get_viewcount()
         vc.modify(task_id)
 
+    @classmethod
+    def bump_hierarchy_version(cls):
+        """Invalidate the cached tag closures"""
+        cls._hierarchy_version += 1
+
     # overiding some functions to not allow dnd of special tags
     def add_parent(self, parent_id):
         p = self.req.get_tag(parent_id)
         if p and not self.is_special() and not p.is_special():
             TreeNode.add_parent(self, parent_id)
+            self.bump_hierarchy_version()
 
     def add_child(self, child_id):
         special_child = self.req.get_tag(child_id).is_special()
         if not self.is_special() and not special_child:
             TreeNode.add_child(self, child_id)
+            self.bump_hierarchy_version()
+
+    def set_parent(self, parent_id):
+        TreeNode.set_parent(self, parent_id)
+        self.bump_hierarchy_version()
+
+    def remove_parent(self, parent_id):
+        TreeNode.remove_parent(self, parent_id)
+        self.bump_hierarchy_version()
+
+    def remove_child(self, child_id):
+        TreeNode.remove_child(self, child_id)
+        self.bump_hierarchy_version()
 
     def get_name(self):
         """Return the name of the tag."""
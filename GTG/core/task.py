@@ -24,6 +24,9 @@ import html
 import re
 import uuid
 import logging
+import functools
+import sys
+import threading
 import xml.sax.saxutils as saxutils
 
 from gettext import gettext as _
@@ -33,6 +36,105 @@ from liblarch import TreeNode
 
 log = logging.getLogger(__name__)
 
+# Subtask references embedded in the content, e.g. {!tid!}
+SUBTASK_REGEX = re.compile(r'\{\!.+?\!\}')
+# Characters affected by XML escaping
+NEEDS_ESCAPE_REGEX = re.compile(r'[&<>]')
+
+# Separator put after a tag inserted at the beginning of the content, keyed
+# by (content is not empty, content starts with a tag)
+TAG_SEPARATORS = {
+    # don't need a separator if it's the only text
+    (False, False): '',
+    # if content starts with a tag, make a comma-separated list
+    (True, True): ', ',
+    # other text at the beginning, so put the tag on its own line
+    (True, False): '\n\n',
+}
+
+
+@functools.lru_cache(maxsize=512)
+def _strip_tag_regex(tagname):
+    """ Compile the pattern matching the occurrences of a tag in a text """
+    tag = re.escape(tagname)
+    return re.compile(f'(@{tag}(?:\n\n|\n|, )?|{tag}(?:\n\n|, ))|{tag},?')
+
+
+def strip_tag(text, tagname, newtag=''):
+    """
+    Replace the occurrences of a tag in text. An occurrence prefixed by an
+    extra '@' or followed by a separator (a line break, an empty line or
+    ', ') is replaced by newtag, separator included. Any other occurrence,
+    including one followed by a lone comma, becomes the name without its
+    '@'. Each occurrence is handled on its own, in a single pass.
+    """
+    # Every occurrence contains the tag name
+    if tagname not in text:
+        return text
+
+    if tagname.startswith('@'):
+        inline_tag = tagname[1:]
+    else:
+        inline_tag = tagname
+
+    return _strip_tag_regex(tagname).sub(
+        lambda m: newtag if m.group(1) is not None else inline_tag, text)
+
+
+def normalize_escaping(text):
+    """ Escape text for XML, without escaping its entities twice """
+    if NEEDS_ESCAPE_REGEX.search(text) is None:
+        # Nothing to unescape nor to escape
+        return text
+    return saxutils.escape(saxutils.unescape(text))
+
+
+@functools.lru_cache(maxsize=1024)
+def escape_tagname(tagname):
+    """ html.escape() for tag names, which come from a small vocabulary """
+    return html.escape(tagname)
+
+
+def as_date(value):
+    """ Wrap value into a Date, unless it is already one """
+    if isinstance(value, Date):
+        return value
+    return Date(value)
+
+
+class SyncState(threading.local):
+    """
+    State of the DisabledSyncCtx of the current thread. Backends modify
+    tasks from their own threads, which must not defer each other's
+    notifications.
+    """
+
+    def __init__(self):
+        # Number of nested DisabledSyncCtx
+        self.depth = 0
+        # Tasks waiting for their notification, by id, see Task.sync()
+        self.pending = {}
+        # Timestamp shared by the tasks modified within the outermost
+        # DisabledSyncCtx, None outside of it
+        self.now = None
+
+
+sync_state = SyncState()
+
+
+def sync_batched(fn):
+    """
+    A decorator running a Task method inside a DisabledSyncCtx, so that the
+    tasks it modifies (including through recursive calls) are notified only
+    once, when the outermost batched call returns.
+    """
+
+    @functools.wraps(fn)
+    def new(*args, **kwargs):
+        with DisabledSyncCtx():
+            return fn(*args, **kwargs)
+    return new
+
 
 class Task(TreeNode):
     """ This class represent a task in GTG.
@@ -44,6 +146,22 @@ class Task(TreeNode):
     STA_DONE = "Done"
     DEFAULT_TASK_NAME = None
 
+    # Bumped on every change to any task or to the task hierarchy. Values
+    # derived from other tasks are cached along with the version they were
+    # computed at, and recomputed when it no longer matches.
+    _tree_version = 0
+
+    __slots__ = (
+        'tid', 'uuid', 'remote_ids', 'content', 'title', 'status',
+        'added_date', 'closed_date', 'due_date', 'start_date',
+        'can_be_deleted', 'tags', '_tags_cache', 'req',
+        '__main_treeview', 'loaded', 'attributes', 'last_modified',
+        'recurring', 'recurring_term', '_recurring_parents_cache',
+        '_urgent_cache', '_urgent_cache_version', '_constraint_cache',
+        '_constraint_cache_version', '_defined_relatives',
+        '_deletable_child_count',
+    )
+
     def __init__(self, task_id, requester, newtask=False):
         super().__init__(task_id)
         # the id of this task in the project should be set
@@ -51,7 +169,8 @@ class Task(TreeNode):
         assert(isinstance(task_id, str) or isinstance(task_id, str))
         self.tid = str(task_id)
         self.set_uuid(task_id)
-        self.remote_ids = {}
+        # rarely used, created on first write
+        self.remote_ids = None
         self.content = ""
         if Task.DEFAULT_TASK_NAME is None:
             Task.DEFAULT_TASK_NAME = _("My new task")
@@ -67,8 +186,12 @@ class Task(TreeNode):
         self.due_date = Date.no_date()
         self.start_date = Date.no_date()
         self.can_be_deleted = newtask
-        # tags
-        self.tags = []
+        # tag names, in order. A tuple replaced on each change, so that it
+        # can be shared between tasks. Tasks have a handful of tags at most,
+        # so membership is tested on the tuple itself.
+        self.tags = ()
+        # tag objects resolved from self.tags, see get_tags()
+        self._tags_cache = None
         self.req = requester
         self.__main_treeview = requester.get_main_view()
         # If we don't have a newtask, we will have to load it.
@@ -76,13 +199,31 @@ class Task(TreeNode):
         # Should not be necessary with the new backends
 #        if self.loaded:
 #            self.req._task_loaded(self.tid)
-        self.attributes = {}
+        # attribute values, by namespace then by name. Most tasks have none,
+        # so the dict is created on first write.
+        self.attributes = None
+        self._urgent_cache = None
+        self._urgent_cache_version = -1
+        self._constraint_cache = None
+        self._constraint_cache_version = -1
+        # closest relatives with a defined due date, by direction. Created
+        # on first use, see _get_defined_relatives()
+        self._defined_relatives = None
+        # Upper bound of the number of subtasks which can be deleted, see
+        # _get_deletable_subtasks()
+        self._deletable_child_count = 0
         self._modified_update()
 
         # Setting the attributes related to repeating tasks.
         self.recurring_term = None
+        self._recurring_parents_cache = (-1, ())
         self.inherit_recursion()
 
+    @classmethod
+    def bump_tree_version(cls):
+        """Invalidate the values cached from other tasks"""
+        cls._tree_version += 1
+
     def get_added_date(self):
         return self.added_date
 
@@ -107,6 +248,7 @@ class Task(TreeNode):
         # avoid doing it multiple times
         if not self.loaded:
             self.loaded = True
+            self.bump_tree_version()
 
     def set_to_keep(self):
         self.can_be_deleted = False
@@ -115,7 +257,7 @@ class Task(TreeNode):
         return self.can_be_deleted
 
     def get_id(self):
-        return str(self.tid)
+        return self.tid
 
     def set_uuid(self, value):
         self.uuid = str(value)
@@ -127,7 +269,7 @@ class Task(TreeNode):
         if self.uuid == "":
             self.set_uuid(uuid.uuid4())
             self.sync()
-        return str(self.uuid)
+        return self.uuid
 
     def get_title(self):
         return self.title
@@ -143,18 +285,20 @@ class Task(TreeNode):
         copy.set_title(self.title)
         copy.content = self.content
         copy.tags = self.tags
+        copy._tags_cache = None
         log.debug("Duppicating task %s as task %s",
                   self.get_id(), copy.get_id())
         return copy
 
+    @sync_batched
     def duplicate_recursively(self):
         """ Duplicates recursively all the task itself and its children while keeping the relationship"""
         newtask = self.duplicate()
-        if self.has_child():
-            for c_tid in self.get_children():
-                child = self.req.get_task(c_tid)
-                if child.is_loaded():
-                    newtask.add_child(child.duplicate_recursively())
+        # Leaf tasks have no children to duplicate
+        for c_tid in self.children:
+            child = self.req.get_task(c_tid)
+            if child.is_loaded():
+                newtask.add_child(child.duplicate_recursively())
 
         newtask.sync()
         return newtask.tid
@@ -185,9 +329,19 @@ class Task(TreeNode):
         else:
             self.set_status(self.STA_DONE)
 
+    @sync_batched
     def set_status(self, status, donedate=None, propagation=False):
         old_status = self.status
         self.can_be_deleted = False
+        # Avoid unnecessary syncing
+        if not status:
+            return
+        elif status == old_status:
+            if status not in [self.STA_DONE, self.STA_DISMISSED]:
+                return
+            elif self.closed_date == as_date(donedate or Date.today()):
+                return
+
         # No need to update children or whatever if the task is not loaded
         if status and self.is_loaded():
             # we first modify the status of the children
@@ -215,8 +369,6 @@ class Task(TreeNode):
                                 (self.STA_ACTIVE)):
                                 par.add_child(nexttask_tid)
 
-                                par.sync()
-
             # If we mark a task as Active and that some parent are not
             # Active, we break the parent/child relation
             # It has no sense to have an active subtask of a done parent.
@@ -263,10 +415,17 @@ class Task(TreeNode):
 
     def recursive_sync(self):
         """Recursively sync the task and all task children. Defined"""
-        self.sync()
-        for sub_id in self.children:
-            sub = self.req.get_task(sub_id)
-            sub.recursive_sync()
+        # Walk the subtree with an explicit stack. A task reachable through
+        # several parents is synced only once.
+        visited = set()
+        stack = [self]
+        while stack:
+            task = stack.pop()
+            if task.tid in visited:
+                continue
+            visited.add(task.tid)
+            task.sync()
+            stack.extend(self.req.get_task(sub_id) for sub_id in task.children)
 
     # ABOUT RECURRING TASKS
     # Like anything related to dates, repeating tasks are subtle and complex
@@ -277,6 +436,7 @@ class Task(TreeNode):
     # However when we are retrieving the task from the XML files, we should only set the
     # the recurring_term.
 
+    @sync_batched
     def set_recurring(self, recurring: bool, recurring_term: str=None, newtask=False):
         """Sets a task as recurring or not, and its recurring term.
 
@@ -368,14 +528,30 @@ class Task(TreeNode):
                 If the task has a recurrent parent, it must be set to recur, itself.
         """
         if self.has_parent():
-            for p_tid in self.get_parents():
-                par = self.req.get_task(p_tid)
-                if par.get_recurring() and par.is_loaded():
-                    self.set_recurring(True, par.get_recurring_term())
-                    self.set_due_date(par.due_date)
+            # Each parent is applied in turn: setting the due date also
+            # propagates it to the other parents
+            for par in self._get_recurring_parents():
+                self.set_recurring(True, par.get_recurring_term())
+                self.set_due_date(par.due_date)
         else:
             self.set_recurring(False)
 
+    def _get_recurring_parents(self):
+        """ Returns the loaded recurring parents the task inherits from """
+        version, recurring_parents = self._recurring_parents_cache
+        if version == Task._tree_version:
+            return recurring_parents
+
+        recurring_parents = []
+        for p_tid in self.parents:
+            par = self.req.get_task(p_tid)
+            if par.get_recurring() and par.is_loaded():
+                recurring_parents.append(par)
+
+        recurring_parents = tuple(recurring_parents)
+        self._recurring_parents_cache = (Task._tree_version, recurring_parents)
+        return recurring_parents
+
 
     def get_next_occurrence(self):
         """Calcutate the next occurrence of a recurring task
@@ -404,9 +580,7 @@ class Task(TreeNode):
         elif today > self.due_date:
             try:
                 next_date = self.due_date.parse_from_date(self.recurring_term, newtask=False)
-                while next_date < date.today():
-                    next_date = next_date.parse_from_date(self.recurring_term, newtask=False)
-                return next_date
+                return next_date.skip_recurrences_before(self.recurring_term, today)
             except:
                 raise ValueError(f'Invalid recurring term {self.recurring_term}')
 
@@ -458,63 +632,71 @@ class Task(TreeNode):
     # sensitive to constraint. If you want to now what constraint there is
     # on this task's due date though, you can obtain it by using
     # get_due_date_constraint method.
+    @sync_batched
     def set_due_date(self, new_duedate):
         """Defines the task's due date."""
 
-        def __get_defined_parent_list(task):
-            """Recursively fetch a list of parents that have a defined due date
-               which is not fuzzy"""
-            parent_list = []
-            for par_id in task.parents:
-                par = self.req.get_task(par_id)
-                if par.get_due_date().is_fuzzy():
-                    parent_list += __get_defined_parent_list(par)
-                else:
-                    parent_list.append(par)
-            return parent_list
-
-        def __get_defined_child_list(task):
-            """Recursively fetch a list of children that have a defined
-               due date which is not fuzzy"""
-            child_list = []
-            for child_id in task.children:
-                child = self.req.get_task(child_id)
-                if child.get_due_date().is_fuzzy():
-                    child_list += __get_defined_child_list(child)
-                else:
-                    child_list.append(child)
-            return child_list
-
         old_due_date = self.due_date
-        new_duedate_obj = Date(new_duedate)  # caching the conversion
+        new_duedate_obj = as_date(new_duedate)  # caching the conversion
         self.due_date = new_duedate_obj
+        changed = old_due_date != new_duedate_obj
+        if changed:
+            self.bump_tree_version()
         # If the new date is fuzzy or undefined, we don't update related tasks
         if not new_duedate_obj.is_fuzzy():
             # if some ancestors' due dates happen before the task's new
             # due date, we update them (except for fuzzy dates)
-            for par in __get_defined_parent_list(self):
-                if par.get_due_date() < new_duedate_obj:
-                    par.set_due_date(new_duedate)
+            for par in self._get_defined_relatives('parents'):
+                if par.due_date < new_duedate_obj:
+                    par.set_due_date(new_duedate_obj)
             # we must apply the constraints to the defined & non-fuzzy children
             # as well
-            for sub in __get_defined_child_list(self):
-                sub_duedate = sub.get_due_date()
+            for sub in self._get_defined_relatives('children'):
                 # if the child's due date happens later than the task's: we
                 # update it to the task's new due date
-                if sub_duedate > new_duedate_obj:
-                    sub.set_due_date(new_duedate)
+                if sub.due_date > new_duedate_obj:
+                    sub.set_due_date(new_duedate_obj)
                 # if the child's start date happens later than
                 # the task's new due date, we update it
                 # (except for fuzzy start dates)
-                sub_startdate = sub.get_start_date()
+                sub_startdate = sub.start_date
                 if not sub_startdate.is_fuzzy() and \
                         sub_startdate > new_duedate_obj:
-                    sub.set_start_date(new_duedate)
+                    sub.set_start_date(new_duedate_obj)
         # If the date changed, we notify the change for the children since the
         # constraints might have changed
-        if old_due_date != new_duedate_obj:
+        if changed:
             self.recursive_sync()
 
+    def _get_defined_relatives(self, direction):
+        """Fetch the closest 'parents' or 'children' (depending on direction)
+        that have a defined due date which is not fuzzy. Tasks with a fuzzy
+        due date are looked through."""
+        if self._defined_relatives is None:
+            self._defined_relatives = {}
+        cached = self._defined_relatives.get(direction)
+        if cached is not None and cached[0] == Task._tree_version:
+            return cached[1]
+
+        # Depth-first walk, in the same order as a recursive one. A task
+        # reachable through several paths is listed or crossed only once.
+        relatives = {}
+        crossed = set()
+        get_task = self.req.get_task
+        stack = list(reversed(getattr(self, direction)))
+        while stack:
+            tid = stack.pop()
+            task = get_task(tid)
+            if not task.due_date.is_fuzzy():
+                relatives.setdefault(tid, task)
+            elif tid not in crossed:
+                crossed.add(tid)
+                stack.extend(reversed(getattr(task, direction)))
+
+        result = list(relatives.values())
+        self._defined_relatives[direction] = (Task._tree_version, result)
+        return result
+
     def get_due_date(self):
         """ Returns the due date, which always respects all constraints """
         return self.due_date
@@ -523,10 +705,16 @@ class Task(TreeNode):
         """
         Returns the most urgent due date among the task and its active subtasks
         """
+        if self._urgent_cache_version == Task._tree_version:
+            return self._urgent_cache
+
         urgent_date = self.get_due_date()
         for subtask in self.get_subtasks():
             if subtask.get_status() == self.STA_ACTIVE:
                 urgent_date = min(urgent_date, subtask.get_urgent_date())
+
+        self._urgent_cache = urgent_date
+        self._urgent_cache_version = Task._tree_version
         return urgent_date
 
     def get_due_date_constraint(self):
@@ -536,6 +724,9 @@ class Task(TreeNode):
         # Check out for constraints depending on date definition/fuzziness.
         strongest_const_date = self.due_date
         if strongest_const_date.is_fuzzy():
+            if self._constraint_cache_version == Task._tree_version:
+                return self._constraint_cache
+
             for par_id in self.parents:
                 par = self.req.get_task(par_id)
                 par_duedate = par.get_due_date()
@@ -557,6 +748,9 @@ class Task(TreeNode):
                 # we compare the dates
                 if par_duedate < strongest_const_date:
                     strongest_const_date = par_duedate
+
+            self._constraint_cache = strongest_const_date
+            self._constraint_cache_version = Task._tree_version
         return strongest_const_date
 
     # ABOUT START DATE
@@ -564,8 +758,11 @@ class Task(TreeNode):
     # Start date is the date at which the user has decided to work or consider
     # working on this task.
     def set_start_date(self, fulldate):
-        self.start_date = Date(fulldate)
-        self.sync()
+        start_date = as_date(fulldate)
+        # Avoid unnecessary syncing
+        if start_date != self.start_date:
+            self.start_date = start_date
+            self.sync()
 
     def get_start_date(self):
         return self.start_date
@@ -576,8 +773,11 @@ class Task(TreeNode):
     # dismissed). Closed date is not constrained and doesn't constrain other
     # dates.
     def set_closed_date(self, fulldate):
-        self.closed_date = Date(fulldate)
-        self.sync()
+        closed_date = as_date(fulldate)
+        # Avoid unnecessary syncing
+        if closed_date != self.closed_date:
+            self.closed_date = closed_date
+            self.sync()
 
     def get_closed_date(self):
         return self.closed_date
@@ -595,7 +795,7 @@ class Task(TreeNode):
     def get_text(self):
         """ Return the content or empty string in case of None """
         if self.content:
-            return str(self.content)
+            return self.content
         else:
             return ""
 
@@ -621,14 +821,16 @@ class Task(TreeNode):
             txt = saxutils.escape(txt)
             txt = txt.strip()
 
-            if strip_tags:
-                for tag in self.get_tags_name():
-                    txt = (txt.replace(f'@{tag}, ', '')
-                              .replace(f'@{tag},', '')
-                              .replace(f'@{tag}', ''))
+            if strip_tags and self.tags and '@' in txt:
+                # Strip every tag, with its trailing comma, in a single pass.
+                # Longer names go first so that a tag is never stripped as
+                # the prefix of another one.
+                names = sorted(self.tags, key=len, reverse=True)
+                pattern = '|'.join(re.escape(tag) for tag in names)
+                txt = re.sub(f'@(?:{pattern})(?:, ?)?', '', txt)
 
             if strip_subtasks:
-                txt = re.sub(r'\{\!.+\!\}', '', txt)
+                txt = SUBTASK_REGEX.sub('', txt)
 
             # Strip blank lines and get desired amount of lines
             txt = [l for l in txt.splitlines() if l]
@@ -679,8 +881,11 @@ class Task(TreeNode):
         self.can_be_deleted = False
         # the core of the method is in the TreeNode object
         TreeNode.add_child(self, tid)
+        self.bump_tree_version()
         # now we set inherited attributes only if it's a new task
         child = self.req.get_task(tid)
+        if child and child.can_be_deleted:
+            self._deletable_child_count += 1
         if self.is_loaded() and child and child.can_be_deleted:
             # If the the child is repeating no need to change the date
             if not child.get_recurring():
@@ -701,23 +906,43 @@ class Task(TreeNode):
         """
         c = self.req.get_task(tid)
         c.remove_parent(self.get_id())
+        self.bump_tree_version()
         if c.can_be_deleted:
+            self._deletable_child_count = max(
+                0, self._deletable_child_count - 1)
             self.req.delete_task(tid)
             self.sync()
             return True
         else:
             return False
 
+    def _get_deletable_subtasks(self):
+        """Return the subtasks which can still be deleted.
+
+        Most tasks have none: the walk is skipped when no such subtask was
+        attached. Subtasks stop being deletable once edited, so the count is
+        refreshed by each walk.
+        """
+        if not self._deletable_child_count:
+            return []
+        subtasks = [child for child in self.get_subtasks()
+                    if child.can_be_deleted]
+        self._deletable_child_count = len(subtasks)
+        return subtasks
+
     # FIXME: remove this function and use liblarch instead.
     def get_subtasks(self):
-        tree = self.get_tree()
-        return [tree.get_node(node_id) for node_id in self.get_children()]
+        get_node = self.get_tree().get_node
+        return [get_node(node_id) for node_id in self.children]
 
     def set_parent(self, parent_id):
         """Update the task's parent. Refresh due date constraints."""
         TreeNode.set_parent(self, parent_id)
+        self.bump_tree_version()
         if parent_id is not None:
             par = self.req.get_task(parent_id)
+            if self.can_be_deleted:
+                par._deletable_child_count += 1
             par_duedate = par.get_due_date_constraint()
             if not par_duedate.is_fuzzy() and \
                 not self.due_date.is_fuzzy() and \
@@ -734,7 +959,9 @@ class Task(TreeNode):
             string.
         """
         val = str(att_value)
-        self.attributes[(namespace, att_name)] = val
+        if self.attributes is None:
+            self.attributes = {}
+        self.attributes.setdefault(namespace, {})[att_name] = val
         self.sync()
 
     def get_attribute(self, att_name, namespace=""):
@@ -742,11 +969,18 @@ class Task(TreeNode):
 
         Returns C{None} if there is no attribute matching C{att_name}.
         """
-        return self.attributes.get((namespace, att_name), None)
+        if self.attributes is None:
+            return None
+        return self.attributes.get(namespace, {}).get(att_name, None)
 
     def sync(self):
         self._modified_update()
-        if self.is_loaded():
+        if sync_state.depth > 0:
+            # The notification is sent when the outermost DisabledSyncCtx
+            # exits, once per task
+            sync_state.pending[self.tid] = self
+            return self.is_loaded()
+        elif self.is_loaded():
             # This is a liblarch call to the TreeNode ancestor
             self.modified()
             return True
@@ -757,7 +991,8 @@ class Task(TreeNode):
         """
         Updates the modified timestamp
         """
-        self.last_modified = datetime.now()
+        self.last_modified = sync_state.now or datetime.now()
+        self.bump_tree_version()
 
 # TAG FUNCTIONS ##############################################################
     def get_tags_name(self):
@@ -766,24 +1001,27 @@ class Task(TreeNode):
 
     # return a copy of the list of tag objects
     def get_tags(self):
-        l = []
-        for tname in self.tags:
-            tag = self.req.get_tag(tname)
-            if not tag:
-                tag = self.req.new_tag(tname)
-            l.append(tag)
-        return l
+        if self._tags_cache is None:
+            l = []
+            for tname in self.tags:
+                tag = self.req.get_tag(tname)
+                if not tag:
+                    tag = self.req.new_tag(tname)
+                l.append(tag)
+            self._tags_cache = l
+        return list(self._tags_cache)
 
     def rename_tag(self, old, new):
-        eold = saxutils.escape(saxutils.unescape(old))
-        enew = saxutils.escape(saxutils.unescape(new))
-        self.content = self.content.replace(eold, enew)
-        oldt = self.req.get_tag(old)
-        self.remove_tag(old)
-        oldt.modified()
-        self.tag_added(new)
-        self.req.get_tag(new).modified()
-        self.sync()
+        # the task is synced once, when leaving the context
+        with DisabledSyncCtx(self):
+            eold = normalize_escaping(old)
+            enew = normalize_escaping(new)
+            self.content = self.content.replace(eold, enew)
+            oldt = self.req.get_tag(old)
+            self.remove_tag(old, _tag_obj=oldt)
+            oldt.modified()
+            self.tag_added(new)
+            self.req.get_tag(new).modified()
 
     def tag_added_by_id(self, tid):
         """Add a tag by its ID"""
@@ -791,20 +1029,25 @@ class Task(TreeNode):
         tag = self.req.ds.get_tag_by_id(tid)
         self.tag_added(tag.get_name())
 
-    def tag_added(self, tagname):
+    def tag_added(self, tagname, _tag_obj=None):
         """
         Adds a tag. Does not add '@tag' to the contents. See add_tag
+
+        _tag_obj is the Tag named tagname, when the caller already has it.
         """
         if tagname not in self.tags:
-            self.tags.append(tagname)
+            # The same few names are shared by many tasks
+            tagname = sys.intern(tagname)
+            self.tags = (*self.tags, tagname)
+            self._tags_cache = None
             if self.is_loaded():
-                for child in self.get_subtasks():
-                    if child.can_be_deleted:
-                        child.tag_added(tagname)
-
-                tag = self.req.get_tag(tagname)
+                tag = _tag_obj or self.req.get_tag(tagname)
                 if not tag:
                     tag = self.req.new_tag(tagname)
+
+                for child in self._get_deletable_subtasks():
+                    child.tag_added(tagname, _tag_obj=tag)
+
                 tag.modified()
             return True
 
@@ -813,37 +1056,28 @@ class Task(TreeNode):
 
         if self.tag_added(tagname):
             c = self.content
-            tagname = html.escape(tagname)
+            tagname = escape_tagname(tagname)
             tagname = '@' + tagname if not tagname.startswith('@') else tagname
 
-            if not c:
-                # don't need a separator if it's the only text
-                sep = ''
-            elif c.startswith('@'):
-                # if content starts with a tag, make a comma-separated list
-                sep = ', '
-            else:
-                # other text at the beginning, so put the tag on its own line
-                sep = '\n\n'
-
-            self.content = f'{tagname}{sep}{c}'
+            sep = TAG_SEPARATORS[(bool(c), c[:1] == '@')]
+            self.content = ''.join((tagname, sep, c))
             # we modify the task internal state, thus we have to call for a
             # sync
 
             self.sync()
 
     # remove by tagname
-    def remove_tag(self, tagname):
+    def remove_tag(self, tagname, _tag_obj=None):
         modified = False
         if tagname in self.tags:
-            self.tags.remove(tagname)
+            self.tags = tuple(t for t in self.tags if t != tagname)
+            self._tags_cache = None
             modified = True
-            for child in self.get_subtasks():
-                if child.can_be_deleted:
-                    child.remove_tag(tagname)
+            tag = _tag_obj or self.req.get_tag(tagname)
+            for child in self._get_deletable_subtasks():
+                child.remove_tag(tagname, _tag_obj=tag)
         self.content = self._strip_tag(self.content, tagname)
         if modified:
-            tag = self.req.get_tag(tagname)
             # The ViewCount of the tag still doesn't know that
             # the task was removed. We need to update manually
             tag.update_task(self.get_id())
@@ -851,50 +1085,26 @@ class Task(TreeNode):
                 tag.modified()
 
     def _strip_tag(self, text, tagname, newtag=''):
-        if tagname.startswith('@'):
-            inline_tag = tagname[1:]
-        else:
-            inline_tag = tagname
-
-        return (text
-                .replace(f'@{tagname}\n\n', newtag)
-                .replace(f'@{tagname}\n', newtag)
-                .replace(f'@{tagname}, ', newtag)
-                .replace(f'@{tagname}', newtag)
-                .replace(f'{tagname}\n\n', newtag)
-                .replace(f'{tagname}, ', newtag)
-                .replace(f'{tagname},', inline_tag)
-                # don't forget a space a the end
-                .replace(f'{tagname}', inline_tag))
+        return strip_tag(text, tagname, newtag)
 
     # tag_list is a list of tags names
     # return true if at least one of the list is in the task
     def has_tags(self, tag_list=None, notag_only=False):
-        # recursive function to explore the tags and its children
-        def children_tag(tagname):
-            toreturn = False
-            if tagname in self.tags:
-                toreturn = True
-            else:
-                tag = self.req.get_tag(tagname)
-                if tag:
-                    for tagc_name in tag.get_children():
-                        if not toreturn:
-                            toreturn = children_tag(tagc_name)
-            return toreturn
-
         # We want to see if the task has no tags
         toreturn = False
         if notag_only:
-            toreturn = self.tags == []
+            toreturn = not self.tags
         # Here, the user ask for the "empty" tag
         # And virtually every task has it.
         elif tag_list == [] or tag_list is None:
             toreturn = True
         elif tag_list:
+            # a tag also matches the tasks tagged with one of its descendants
+            get_closure = self.req.get_tag_closure
             for tagname in tag_list:
-                if not toreturn:
-                    toreturn = children_tag(tagname)
+                if not get_closure(tagname).isdisjoint(self.tags):
+                    toreturn = True
+                    break
         else:
             # Well, if we don't filter on tags or notag, it's true, of course
             toreturn = True
@@ -905,6 +1115,41 @@ class Task(TreeNode):
                 self.title,
                 self.tid,
                 self.status,
-                str(self.tags),
+                str(list(self.tags)),
                 str(self.added_date),
                 str(self.recurring))
+
+
+class DisabledSyncCtx():
+    """
+    Defers the notifications sent by Task.sync() until the outermost context
+    of the current thread exits. Each task synced meanwhile is notified only
+    once. If a task is given, it is synced on exit.
+    usage::
+        with DisabledSyncCtx(task):
+            # modify task and its relatives
+    """
+
+    def __init__(self, task=None):
+        self.task = task
+
+    def __enter__(self):
+        if sync_state.depth == 0:
+            sync_state.now = datetime.now()
+        sync_state.depth += 1
+
+    def __exit__(self, type, value, traceback):
+        try:
+            if self.task is not None:
+                self.task.sync()
+        finally:
+            sync_state.depth -= 1
+            if sync_state.depth == 0:
+                sync_state.now = None
+                pending = sync_state.pending
+                sync_state.pending = {}
+                for task in pending.values():
+                    if task.is_loaded():
+                        # This is a liblarch call to the TreeNode ancestor
+                        task.modified()
+        return False
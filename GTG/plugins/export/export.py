@@ -18,29 +18,53 @@
 """ Export plugin
 Plugin for exporting into nice lists in TXT, HTML or PDF """
 
+import functools
+import itertools
 import os
 import shutil
-import subprocess
 import webbrowser
 import logging
 
 from gi.repository import GObject, Gtk, GdkPixbuf, GLib
 
 from gettext import gettext as _
-from GTG.plugins.export.task_str import get_task_wrappers
-from GTG.plugins.export.templates import Template, get_templates_paths
+from GTG.plugins.export.task_str import iter_task_wrappers
+from GTG.plugins.export.templates import Template, get_templates_paths, \
+    get_templates_state, get_mtime
 
 log = logging.getLogger(__name__)
 
 
-# Enforce external dependencies
-for dependence in "pdflatex", "pdftk", "pdfjam":
-    retval = subprocess.call(["which", dependence],
-                             stdout=subprocess.PIPE,
-                             stderr=subprocess.DEVNULL,)
-    if retval != 0:
-        log.debug('Missing command %r', dependence)
-        raise ImportError(f'Missing command "{dependence}"')
+# Number of root tasks converted per idle callback while exporting
+EXPORT_BATCH_SIZE = 50
+
+# External commands needed to generate PDF documents
+DEPENDENCIES = ("pdflatex", "pdftk", "pdfjam")
+
+
+def check_dependencies():
+    """ Raise ImportError listing the missing external commands """
+    # Look the commands up in PATH without spawning `which`
+    missing = [dependence for dependence in DEPENDENCIES
+               if shutil.which(dependence) is None]
+    if missing:
+        log.debug('Missing commands %r', missing)
+        raise ImportError(f'Missing commands "{", ".join(missing)}"')
+
+
+# Enforce external dependencies. The plugin engine relies on the
+# ImportError raised when loading this module to flag the plugin as broken.
+check_dependencies()
+
+
+@functools.lru_cache(maxsize=32)
+def load_scaled_pixbuf(path, mtime, width, height):
+    """ Returns the image at path scaled to the given size. Previews are
+    cached, so that going back to a template doesn't decode it again.
+    mtime is the modification time of the image, to reload it when it is
+    edited. """
+    pixbuf = GdkPixbuf.Pixbuf.new_from_file(path)
+    return pixbuf.scale_simple(width, height, GdkPixbuf.InterpType.BILINEAR)
 
 
 def get_desktop_dir():
@@ -63,6 +87,10 @@ class ExportPlugin():
     def __init__(self):
         self.filename = None
         self.template = None
+        # Templates listed in the combobox, to skip refilling it
+        self._templates_key = None
+        # Idle source converting the tasks to export, if any
+        self._collect_source = None
 
     def activate(self, plugin_api):
         """ Loads saved preferences """
@@ -73,6 +101,7 @@ class ExportPlugin():
 
     def deactivate(self, plugin_api):
         """ Removes the gtk widgets before quitting """
+        self._cancel_collect()
         self._gtk_deactivate()
 
 # CALLBACK AND CORE FUNCTIONS #################################################
@@ -85,8 +114,48 @@ class ExportPlugin():
         active = self.combo.get_active()
         self.template = Template(model[active][0])
 
-        tasks = self.get_selected_tasks()
+        self.save_button.set_sensitive(False)
+        self.open_button.set_sensitive(False)
+
+        # Convert the tasks in idle callbacks to keep the UI responsive
+        wrappers = self.get_selected_tasks()
+        tasks = []
+        self._collect_source = GLib.idle_add(
+            self._collect_tasks, wrappers, tasks, saving)
+
+    def _collect_tasks(self, wrappers, tasks, saving):
+        """ Convert the next batch of tasks. Once all of them are
+        converted, generate the document. """
+        try:
+            batch = list(itertools.islice(wrappers, EXPORT_BATCH_SIZE))
+        except Exception as err:
+            log.exception('Could not convert the tasks to export')
+            self._collect_source = None
+            self._enable_buttons()
+            self.show_error_dialog(
+                _("GTG could not generate the document: %s") % err)
+            return False
+
+        tasks.extend(task for task in batch if task is not None)
+        if len(batch) == EXPORT_BATCH_SIZE:
+            # Call again
+            return True
+
+        self._collect_source = None
+        self._generate(tasks, saving)
+        return False
+
+    def _cancel_collect(self):
+        """ Stop converting the tasks, if an export is being started """
+        if self._collect_source is not None:
+            GLib.source_remove(self._collect_source)
+            self._collect_source = None
+            self._enable_buttons()
+
+    def _generate(self, tasks, saving):
+        """ Generate the document from the converted tasks """
         if len(tasks) == 0:
+            self._enable_buttons()
             self.show_error_dialog(_("No task matches your criteria. "
                                      "Empty report can't be generated."))
             return
@@ -95,11 +164,9 @@ class ExportPlugin():
         if saving:
             self.filename = self.choose_file()
             if self.filename is None:
+                self._enable_buttons()
                 return
 
-        self.save_button.set_sensitive(False)
-        self.open_button.set_sensitive(False)
-
         try:
             self.template.generate(tasks, self.plugin_api,
                                    self.on_export_finished)
@@ -121,12 +188,17 @@ class ExportPlugin():
             self.show_error_dialog("Document creation failed. "
                                    "Ensure you have all needed programs.")
 
+        self._enable_buttons()
+        self.export_dialog.hide()
+
+    def _enable_buttons(self):
+        """ Allow starting an export again """
         self.save_button.set_sensitive(True)
         self.open_button.set_sensitive(True)
-        self.export_dialog.hide()
 
     def get_selected_tasks(self):
-        """ Filter tasks based on user option """
+        """ Filter tasks based on user option. Returns an iterator
+        converting them, see iter_task_wrappers() """
         timespan = None
         req = self.plugin_api.get_requester()
 
@@ -142,7 +214,7 @@ class ExportPlugin():
         if treename not in tree.list_applied_filters():
             tree.apply_filter(treename)
 
-        return get_task_wrappers(tree, timespan)
+        return iter_task_wrappers(tree, timespan)
 
 # GTK FUNCTIONS ###############################################################
     def _init_gtk(self):
@@ -206,11 +278,19 @@ class ExportPlugin():
     def _hide_dialog(self, sender=None, data=None):
 
         """ Hide dialog """
+        # Don't export once the user closed the dialog
+        self._cancel_collect()
         self.export_dialog.hide()
         return True
 
     def _update_combobox(self):
         """ Reload list of templates """
+        templates_key = get_templates_state()
+        if templates_key == self._templates_key:
+            # Same files, the model and the selection are still valid
+            return
+        self._templates_key = templates_key
+
         model = self.combo.get_model()
         model.clear()
 
@@ -243,10 +323,8 @@ class ExportPlugin():
         description, image = model[active][2], model[active][3]
 
         if image:
-            pixbuf = GdkPixbuf.Pixbuf.new_from_file(image)
             width, height = self.export_image.get_size_request()
-            pixbuf = pixbuf.scale_simple(width, height,
-                                         GdkPixbuf.InterpType.BILINEAR)
+            pixbuf = load_scaled_pixbuf(image, get_mtime(image), width, height)
             self.export_image.set_from_pixbuf(pixbuf)
         else:
             self.export_image.clear()
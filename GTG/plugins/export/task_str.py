@@ -73,17 +73,26 @@ def get_task_wrappers(tree, days=None, task_id=None):
         else:
             return task.get_days_left() <= days
 
+    if task_id is None:
+        return [wrapper for wrapper in iter_task_wrappers(tree, days)
+                if wrapper is not None]
+
     subtasks = []
     for sub_id in tree.node_all_children(task_id):
         subtask = get_task_wrappers(tree, days, sub_id)
         if subtask is not None:
             subtasks.append(subtask)
 
-    if task_id is None:
-        return subtasks
-    else:
-        task = tree.get_node(task_id)
-        if task is None or not _is_in_timespan(task):
-            return None
+    task = tree.get_node(task_id)
+    if task is None or not _is_in_timespan(task):
+        return None
+
+    return TaskStr(task, subtasks)
+
 
-        return TaskStr(task, subtasks)
+def iter_task_wrappers(tree, days=None):
+    """ Yield the TaskStr of each root task of the tree, with its subtasks,
+    or None if the task is filtered out. It allows to convert a big tree
+    step by step, see get_task_wrappers() for the parameters. """
+    for task_id in tree.node_all_children(None):
+        yield get_task_wrappers(tree, days, task_id)
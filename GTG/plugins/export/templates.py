@@ -18,6 +18,7 @@
 """ Module for discovering templates and work with templates """
 
 from glob import glob
+import importlib
 import os.path
 import subprocess
 import sys
@@ -36,13 +37,49 @@ TEMPLATE_PATHS = [
 ]
 
 
+# Modification times of TEMPLATE_PATHS and the templates found in them
+_templates_cache = {'mtimes': None, 'paths': []}
+
+
+def get_mtime(path):
+    """ Returns the modification time of path, None if it is missing """
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
 def get_templates_paths():
     """ Returns a list containing the full path for all the
-    available templates. """
-    template_list = []
+    available templates. The directories are scanned again only when
+    one of them was modified. """
+    mtimes = tuple(get_mtime(a_dir) for a_dir in TEMPLATE_PATHS)
+    if mtimes != _templates_cache['mtimes']:
+        template_list = []
+        for a_dir in TEMPLATE_PATHS:
+            template_list += glob(os.path.join(a_dir, "template_*"))
+        _templates_cache['paths'] = template_list
+        _templates_cache['mtimes'] = mtimes
+    return list(_templates_cache['paths'])
+
+
+def get_templates_state():
+    """ Returns the path and modification time of every file in the
+    template directories. It changes whenever a template, or one of its
+    thumbnails, descriptions or scripts, is added, removed or edited. """
+    state = []
     for a_dir in TEMPLATE_PATHS:
-        template_list += glob(os.path.join(a_dir, "template_*"))
-    return template_list
+        try:
+            names = sorted(os.listdir(a_dir))
+        except OSError:
+            continue
+        for name in names:
+            # Compiled descriptions don't change what is displayed
+            if name == '__pycache__':
+                continue
+            path = os.path.join(a_dir, name)
+            state.append((path, get_mtime(path)))
+    return tuple(state)
 
 
 class Template():
@@ -81,8 +118,12 @@ class Template():
             sys.path.append(dir_path)
         module_name = os.path.basename(path).replace(".py", "")
         try:
-            module = __import__(module_name, globals(), locals(),
-                                ['description'], 0)
+            if module_name in sys.modules:
+                # Pick up a description edited since it was first imported
+                module = importlib.reload(sys.modules[module_name])
+            else:
+                module = __import__(module_name, globals(), locals(),
+                                    ['description'], 0)
             return module.title, module.description
         except (ImportError, AttributeError):
             return "", ""
@@ -18,6 +18,7 @@
 
 from unittest import TestCase
 
+from GTG.core.datastore import DataStore
 from GTG.core.tag import Tag
 
 
@@ -66,3 +67,80 @@ class TestTag(TestCase):
 
         self.assertEqual('foo', self.tag.get_name())
         self.assertEqual('foo', self.tag.get_attribute('name'))
+
+
+class FakeTag():
+    """ Tag with fixed children, for hierarchies the tag tree can't hold """
+
+    def __init__(self, children):
+        self.children = children
+
+    def get_children(self):
+        return self.children
+
+
+class TestTagClosure(TestCase):
+    def setUp(self):
+        self.datastore = DataStore()
+        self.req = self.datastore.get_requester()
+        for name in ('@a', '@b', '@c'):
+            self.datastore.new_tag(name)
+        self.datastore.get_tag('@b').set_parent('@a')
+        self.datastore.get_tag('@c').set_parent('@b')
+
+    def test_closure_contains_tag_and_descendants(self):
+        self.assertEqual({'@a', '@b', '@c'},
+                         self.req.get_tag_closure('@a'))
+        self.assertEqual({'@c'}, self.req.get_tag_closure('@c'))
+
+    def test_closure_of_unknown_tag_is_tag_itself(self):
+        self.assertEqual({'@missing'}, self.req.get_tag_closure('@missing'))
+
+    def test_reparenting_updates_closure(self):
+        self.assertEqual({'@b', '@c'}, self.req.get_tag_closure('@b'))
+        self.datastore.get_tag('@c').set_parent('@a')
+        self.assertEqual({'@b'}, self.req.get_tag_closure('@b'))
+        self.assertEqual({'@a', '@b', '@c'},
+                         self.req.get_tag_closure('@a'))
+
+    def test_removing_parent_updates_closure(self):
+        self.assertEqual({'@a', '@b', '@c'},
+                         self.req.get_tag_closure('@a'))
+        self.datastore.get_tag('@b').remove_parent('@a')
+        self.assertEqual({'@a'}, self.req.get_tag_closure('@a'))
+
+    def test_removing_tag_updates_closure(self):
+        self.assertEqual({'@b', '@c'}, self.req.get_tag_closure('@b'))
+        self.datastore.remove_tag('@c')
+        self.assertEqual({'@b'}, self.req.get_tag_closure('@b'))
+
+    def test_new_tag_updates_closure(self):
+        self.assertEqual({'@c'}, self.req.get_tag_closure('@c'))
+        self.datastore.new_tag('@d')
+        self.datastore.get_tag('@d').set_parent('@c')
+        self.assertEqual({'@c', '@d'}, self.req.get_tag_closure('@c'))
+
+    def test_closure_survives_cycles(self):
+        children = {'@x': ['@y'], '@y': ['@z', '@x'], '@z': []}
+        self.datastore.get_tag = lambda name: FakeTag(children[name])
+        self.assertEqual({'@x', '@y', '@z'},
+                         self.datastore.get_tag_closure('@x'))
+
+    def test_has_tags_matches_descendant_tags(self):
+        task = self.req.new_task(tags=['@c'])
+        self.assertTrue(task.has_tags(['@a']))
+        self.assertTrue(task.has_tags(['@c']))
+        self.assertFalse(task.has_tags(['@missing']))
+
+    def test_has_tags_follows_reparenting(self):
+        task = self.req.new_task(tags=['@c'])
+        self.assertTrue(task.has_tags(['@b']))
+        self.datastore.get_tag('@c').set_parent('@a')
+        self.assertFalse(task.has_tags(['@b']))
+        self.assertTrue(task.has_tags(['@a']))
+
+    def test_has_tags_follows_tag_removal(self):
+        task = self.req.new_task(tags=['@b'])
+        self.assertTrue(task.has_tags(['@a']))
+        self.datastore.remove_tag('@b')
+        self.assertFalse(task.has_tags(['@a']))
@@ -0,0 +1,358 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2014 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+from collections import Counter
+from datetime import date, timedelta
+from unittest import TestCase
+
+from mock import patch
+
+from GTG.core.datastore import DataStore
+from GTG.core.dates import Date
+from GTG.core.task import Task, normalize_escaping, strip_tag
+
+
+class TestStripTag(TestCase):
+    """ strip_tag, used when removing or renaming a tag """
+
+    def test_keeps_text_without_tag(self):
+        self.assertEqual('Buy milk', strip_tag('Buy milk', '@work'))
+
+    def test_removes_tag_on_its_own_line(self):
+        self.assertEqual('Buy milk', strip_tag('@work\n\nBuy milk', '@work'))
+
+    def test_removes_tag_from_comma_separated_list(self):
+        self.assertEqual('@home', strip_tag('@work, @home', '@work'))
+        self.assertEqual('Buy milk', strip_tag('Buy @work, milk', '@work'))
+
+    def test_keeps_name_of_inline_tag(self):
+        self.assertEqual('Buy work milk', strip_tag('Buy @work milk', '@work'))
+
+    def test_keeps_name_of_tag_followed_by_lone_comma(self):
+        self.assertEqual('Buy workmilk', strip_tag('Buy @work,milk', '@work'))
+
+    def test_removes_tag_with_extra_at_sign(self):
+        self.assertEqual('Go  now', strip_tag('Go @@work now', '@work'))
+
+    def test_handles_each_occurrence_on_its_own(self):
+        # Removing an occurrence doesn't make its neighbour match another
+        # pattern
+        self.assertEqual('work ', strip_tag('@work,@work\n\n ', '@work'))
+
+    def test_replaces_tag_with_separator_by_new_tag(self):
+        self.assertEqual('a @job\n\nb',
+                         strip_tag('a @work\n\nb', '@work', '@job\n\n'))
+        self.assertEqual('@job, b', strip_tag('@work, b', '@work', '@job, '))
+
+    def test_escapes_tag_name_in_pattern(self):
+        self.assertEqual('a b', strip_tag('a @c++, b', '@c++'))
+
+
+class TestNormalizeEscaping(TestCase):
+    """ normalize_escaping, used when renaming a tag """
+
+    def test_keeps_plain_text(self):
+        text = '@work'
+        self.assertIs(text, normalize_escaping(text))
+
+    def test_escapes_special_characters(self):
+        self.assertEqual('a &amp; &lt;b&gt;', normalize_escaping('a & <b>'))
+
+    def test_doesnt_escape_entities_twice(self):
+        self.assertEqual('&amp;', normalize_escaping('&amp;'))
+        self.assertEqual('a &amp; &lt;b', normalize_escaping('a &amp; <b'))
+
+
+class TestTreeCaches(TestCase):
+    """ Urgent dates and due date constraints, cached until the tree changes """
+
+    def setUp(self):
+        self.datastore = DataStore()
+        self.req = self.datastore.get_requester()
+        self.parent_due = Date(date(2030, 1, 20))
+        self.child_due = Date(date(2030, 1, 10))
+        self.parent = self.new_task(self.parent_due)
+        self.child = self.new_task(self.child_due)
+        self.undated = self.new_task()
+
+    def new_task(self, due_date=None):
+        task = self.req.new_task()
+        if due_date is not None:
+            task.set_due_date(due_date)
+        # As if edited, so that add_child doesn't change its dates
+        task.can_be_deleted = False
+        return task
+
+    def test_urgent_date_follows_add_child(self):
+        self.assertEqual(self.parent_due, self.parent.get_urgent_date())
+        self.parent.add_child(self.child.get_id())
+        self.assertEqual(self.child_due, self.parent.get_urgent_date())
+
+    def test_urgent_date_follows_remove_child(self):
+        self.parent.add_child(self.child.get_id())
+        self.assertEqual(self.child_due, self.parent.get_urgent_date())
+        self.parent.remove_child(self.child.get_id())
+        self.assertEqual(self.parent_due, self.parent.get_urgent_date())
+
+    def test_urgent_date_follows_set_parent(self):
+        self.assertEqual(self.parent_due, self.parent.get_urgent_date())
+        self.child.set_parent(self.parent.get_id())
+        self.assertEqual(self.child_due, self.parent.get_urgent_date())
+
+    def test_urgent_date_follows_child_due_date(self):
+        self.parent.add_child(self.child.get_id())
+        self.assertEqual(self.child_due, self.parent.get_urgent_date())
+        sooner = Date(date(2030, 1, 5))
+        self.child.set_due_date(sooner)
+        self.assertEqual(sooner, self.parent.get_urgent_date())
+
+    def test_urgent_date_follows_delete_task(self):
+        self.parent.add_child(self.child.get_id())
+        self.assertEqual(self.child_due, self.parent.get_urgent_date())
+        self.req.delete_task(self.child.get_id())
+        self.assertEqual(self.parent_due, self.parent.get_urgent_date())
+
+    def test_constraint_follows_add_child(self):
+        self.assertEqual(Date.no_date(),
+                         self.undated.get_due_date_constraint())
+        self.parent.add_child(self.undated.get_id())
+        self.assertEqual(self.parent_due,
+                         self.undated.get_due_date_constraint())
+
+    def test_constraint_follows_remove_child(self):
+        self.parent.add_child(self.undated.get_id())
+        self.assertEqual(self.parent_due,
+                         self.undated.get_due_date_constraint())
+        self.parent.remove_child(self.undated.get_id())
+        self.assertEqual(Date.no_date(),
+                         self.undated.get_due_date_constraint())
+
+    def test_constraint_follows_set_parent(self):
+        self.assertEqual(Date.no_date(),
+                         self.undated.get_due_date_constraint())
+        self.undated.set_parent(self.parent.get_id())
+        self.assertEqual(self.parent_due,
+                         self.undated.get_due_date_constraint())
+
+    def test_constraint_follows_parent_due_date(self):
+        self.parent.add_child(self.undated.get_id())
+        self.assertEqual(self.parent_due,
+                         self.undated.get_due_date_constraint())
+        sooner = Date(date(2030, 1, 5))
+        self.parent.set_due_date(sooner)
+        self.assertEqual(sooner, self.undated.get_due_date_constraint())
+
+    def test_constraint_follows_delete_task(self):
+        self.parent.add_child(self.undated.get_id())
+        self.assertEqual(self.parent_due,
+                         self.undated.get_due_date_constraint())
+        self.req.delete_task(self.parent.get_id(), recursive=False)
+        self.assertEqual(Date.no_date(),
+                         self.undated.get_due_date_constraint())
+
+
+class TestSyncBatching(TestCase):
+    """ Cascades notify each modified task once """
+
+    def setUp(self):
+        self.datastore = DataStore()
+        self.req = self.datastore.get_requester()
+
+    def test_set_status_notifies_each_task_once(self):
+        parent = self.req.new_task()
+        children = [parent.new_subtask() for _ in range(2)]
+        grandchild = children[0].new_subtask()
+
+        with patch.object(Task, 'modified', autospec=True) as modified:
+            parent.set_status(Task.STA_DONE)
+
+        notified = Counter(call[0][0].get_id()
+                           for call in modified.call_args_list)
+        expected = {task.get_id(): 1
+                    for task in [parent, grandchild] + children}
+        self.assertEqual(expected, dict(notified))
+        self.assertEqual(Task.STA_DONE, grandchild.get_status())
+
+
+class TestDueDatePropagation(TestCase):
+    """ Due dates pushed to the closest dated relatives """
+
+    def setUp(self):
+        self.datastore = DataStore()
+        self.req = self.datastore.get_requester()
+        # An undated task between two dated ones is looked through
+        self.top = self.new_task(Date(date(2030, 1, 20)))
+        self.middle = self.new_task()
+        self.bottom = self.new_task(Date(date(2030, 1, 10)))
+        self.top.add_child(self.middle.get_id())
+        self.middle.add_child(self.bottom.get_id())
+
+    def new_task(self, due_date=None):
+        task = self.req.new_task()
+        if due_date is not None:
+            task.set_due_date(due_date)
+        # As if edited, so that add_child doesn't change its dates
+        task.can_be_deleted = False
+        return task
+
+    def test_due_date_reaches_descendant_through_undated_task(self):
+        sooner = Date(date(2030, 1, 5))
+        self.top.set_due_date(sooner)
+        self.assertEqual(sooner, self.bottom.get_due_date())
+        self.assertEqual(Date.no_date(), self.middle.get_due_date())
+
+    def test_due_date_reaches_ancestor_through_undated_task(self):
+        later = Date(date(2030, 1, 25))
+        self.bottom.set_due_date(later)
+        self.assertEqual(later, self.top.get_due_date())
+        self.assertEqual(Date.no_date(), self.middle.get_due_date())
+
+    def test_removed_descendant_is_left_alone(self):
+        self.top.set_due_date(Date(date(2030, 1, 15)))
+        self.assertEqual(Date(date(2030, 1, 10)), self.bottom.get_due_date())
+        self.middle.remove_child(self.bottom.get_id())
+        self.top.set_due_date(Date(date(2030, 1, 5)))
+        self.assertEqual(Date(date(2030, 1, 10)), self.bottom.get_due_date())
+
+    def test_new_descendant_is_constrained(self):
+        self.top.set_due_date(Date(date(2030, 1, 15)))
+        other = self.new_task(Date(date(2030, 1, 12)))
+        self.middle.add_child(other.get_id())
+        sooner = Date(date(2030, 1, 5))
+        self.top.set_due_date(sooner)
+        self.assertEqual(sooner, other.get_due_date())
+        self.assertEqual(sooner, self.bottom.get_due_date())
+
+
+class TestRecurringTasks(TestCase):
+    """ Recurrence inherited from parents and completed recurring tasks """
+
+    def setUp(self):
+        self.datastore = DataStore()
+        self.req = self.datastore.get_requester()
+
+    def new_tasks(self, known):
+        """ Tasks of the datastore which are not in known """
+        known_ids = {task.get_id() for task in known}
+        return [self.req.get_task(tid)
+                for tid in self.datastore.get_all_tasks()
+                if tid not in known_ids]
+
+    def test_subtask_inherits_recurrence(self):
+        parent = self.req.new_task()
+        parent.set_recurring(True, 'week', newtask=True)
+        child = self.req.new_task()
+        child.set_parent(parent.get_id())
+        self.assertTrue(child.get_recurring())
+        self.assertEqual('week', child.get_recurring_term())
+        self.assertEqual(parent.get_due_date(), child.get_due_date())
+
+    def test_completed_task_is_duplicated_with_subtasks(self):
+        due = Date(date.today() + timedelta(5))
+        parent = self.req.new_task()
+        parent.set_title('Water the plants')
+        parent.set_recurring(True, 'day')
+        parent.set_due_date(due)
+        child = parent.new_subtask()
+        child.set_title('Fill the can')
+
+        parent.set_status(Task.STA_DONE)
+
+        self.assertEqual(Task.STA_DONE, child.get_status())
+        next_due = Date(date.today() + timedelta(6))
+        copies = self.new_tasks([parent, child])
+        self.assertEqual(2, len(copies))
+        copy, = [task for task in copies if not task.has_parent()]
+        self.assertEqual('Water the plants', copy.get_title())
+        self.assertEqual(Task.STA_ACTIVE, copy.get_status())
+        self.assertTrue(copy.get_recurring())
+        self.assertEqual('day', copy.get_recurring_term())
+        self.assertEqual(next_due, copy.get_due_date())
+
+        copy_child, = copy.get_subtasks()
+        self.assertEqual('Fill the can', copy_child.get_title())
+        self.assertEqual(Task.STA_ACTIVE, copy_child.get_status())
+        self.assertTrue(copy_child.get_recurring())
+        self.assertEqual(next_due, copy_child.get_due_date())
+
+    def test_late_task_is_duplicated_from_today(self):
+        task = self.req.new_task()
+        task.set_recurring(True, 'day')
+        task.set_due_date(Date(date.today() - timedelta(10)))
+
+        task.set_status(Task.STA_DONE)
+
+        copy, = self.new_tasks([task])
+        self.assertEqual(Date.today(), copy.get_due_date())
+
+    def test_completed_subtask_keeps_its_tags(self):
+        parent = self.req.new_task()
+        parent.add_tag('@home')
+        child = self.req.new_task()
+        child.add_tag('@work')
+        child.set_recurring(True, 'day', newtask=True)
+        # As if edited, so that it doesn't take its parent's tags
+        child.can_be_deleted = False
+        parent.add_child(child.get_id())
+
+        child.set_status(Task.STA_DONE)
+
+        # The copy is attached to the parent and takes its tags
+        copy, = self.new_tasks([parent, child])
+        self.assertEqual([parent.get_id()], list(copy.get_parents()))
+        self.assertEqual(['@work', '@home'], copy.get_tags_name())
+        self.assertEqual(['@work'], child.get_tags_name())
+
+
+class TestDeletableSubtasks(TestCase):
+    """ Untouched subtasks, which still follow their parent's tags """
+
+    def setUp(self):
+        self.datastore = DataStore()
+        self.req = self.datastore.get_requester()
+        self.parent = self.req.new_task()
+        self.edited = self.parent.new_subtask()
+        self.untouched = self.parent.new_subtask()
+
+    def test_new_subtasks_are_deletable(self):
+        deletable = self.parent._get_deletable_subtasks()
+        self.assertEqual({self.edited.get_id(), self.untouched.get_id()},
+                         {task.get_id() for task in deletable})
+
+    def test_edited_subtask_is_not_deletable(self):
+        self.edited.set_text('Call the plumber')
+        self.assertEqual([self.untouched],
+                         self.parent._get_deletable_subtasks())
+
+    def test_removed_subtask_is_not_listed(self):
+        untouched_id = self.untouched.get_id()
+        self.parent.remove_child(untouched_id)
+        self.assertFalse(self.req.has_task(untouched_id))
+        self.assertEqual([self.edited],
+                         self.parent._get_deletable_subtasks())
+
+    def test_no_subtask_left_after_edit_and_removal(self):
+        self.edited.set_text('Call the plumber')
+        self.parent.remove_child(self.untouched.get_id())
+        self.assertEqual([], self.parent._get_deletable_subtasks())
+
+    def test_tags_reach_only_deletable_subtasks(self):
+        self.edited.set_text('Call the plumber')
+        self.parent.tag_added('@home')
+        self.assertEqual(['@home'], self.untouched.get_tags_name())
+        self.assertEqual([], self.edited.get_tags_name())
@@ -20,7 +20,7 @@ from datetime import date, timedelta
 from unittest import TestCase
 
 from gettext import gettext as _
-from GTG.core.dates import Date
+from GTG.core.dates import Date, get_recurring_stride
 
 
 def next_month(aday, day=None):
@@ -127,3 +127,25 @@ class TestDates(TestCase):
                 aday = aday.replace(day=i)
 
             self.assertEqual(Date.parse(str(i)), aday)
+
+    def test_recurring_stride(self):
+        self.assertEqual(get_recurring_stride('day'), 1)
+        self.assertEqual(get_recurring_stride('Other-Day'), 2)
+        self.assertEqual(get_recurring_stride('week'), 7)
+        self.assertEqual(get_recurring_stride(_('week')), 7)
+        self.assertIsNone(get_recurring_stride('month'))
+        self.assertIsNone(get_recurring_stride('monday'))
+
+    def test_skip_recurrences_matches_step_by_step(self):
+        """ Jumping over the missed occurrences gives the same date as
+        following the recurring term one occurrence at a time """
+        start = Date(date(2020, 2, 27))
+        # month and monday have no fixed stride and are followed step by step
+        for term in ('day', 'other-day', 'week', 'month', 'monday'):
+            for late in (0, 1, 2, 6, 7, 8, 13, 14, 15, 400):
+                day = date(2020, 2, 27) + timedelta(late)
+                expected = start
+                while expected < day:
+                    expected = expected.parse_from_date(term, newtask=False)
+                self.assertEqual(
+                    start.skip_recurrences_before(term, day), expected)